@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Header, Query
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, Header, Query, Response
+from fastapi.routing import APIRoute
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
-from enum import Enum
+from pydantic import TypeAdapter
+from typing import List, Optional, Dict, Set
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import inspect
+import os
+import orjson
 from datetime import datetime
-import uvicorn
+
+# Importable both as demo.main (e.g. `uvicorn demo.main:app`) and as a plain
+# script from inside demo/ (`python main.py`)
+try:
+    from .models import ApiResponse, Category, Order, OrderStatus, Pet, PetStatus, Tag, User
+except ImportError:
+    from models import ApiResponse, Category, Order, OrderStatus, Pet, PetStatus, Tag, User
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_sample_data()
+    yield
 
 app = FastAPI(
     title="Swagger Petstore",
     description="This is a sample server Petstore server. You can find out more about Swagger at [http://swagger.io](http://swagger.io) or on [irc.freenode.net, #swagger](http://swagger.io/irc/). For this sample, you can use the api key `special-key` to test the authorization filters.",
     version="1.0.7",
+    lifespan=lifespan,
     terms_of_service="http://swagger.io/terms/",
     contact={
         "email": "apiteam@swagger.io"
@@ -20,73 +39,88 @@ app = FastAPI(
     },
 )
 
+# Compress large JSON bodies such as the pet search results; small replies
+# are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Security schemes
 security = HTTPBearer()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Enums
-class PetStatus(str, Enum):
-    available = "available"
-    pending = "pending"
-    sold = "sold"
-
-class OrderStatus(str, Enum):
-    placed = "placed"
-    approved = "approved"
-    delivered = "delivered"
-
-# Models
-class Category(BaseModel):
-    id: Optional[int] = Field(None, format="int64")
-    name: Optional[str] = None
-
-class Tag(BaseModel):
-    id: Optional[int] = Field(None, format="int64")
-    name: Optional[str] = None
-
-class Pet(BaseModel):
-    id: Optional[int] = Field(None, format="int64")
-    category: Optional[Category] = None
-    name: str = Field(..., example="doggie")
-    photoUrls: List[str] = Field(..., description="Pet photo URLs")
-    tags: Optional[List[Tag]] = None
-    status: Optional[PetStatus] = Field(None, description="pet status in the store")
-
-class ApiResponse(BaseModel):
-    code: Optional[int] = Field(None, format="int32")
-    type: Optional[str] = None
-    message: Optional[str] = None
-
-class Order(BaseModel):
-    id: Optional[int] = Field(None, format="int64")
-    petId: Optional[int] = Field(None, format="int64")
-    quantity: Optional[int] = Field(None, format="int32")
-    shipDate: Optional[datetime] = None
-    status: Optional[OrderStatus] = Field(None, description="Order Status")
-    complete: Optional[bool] = None
-
-class User(BaseModel):
-    id: Optional[int] = Field(None, format="int64")
-    username: Optional[str] = None
-    firstName: Optional[str] = None
-    lastName: Optional[str] = None
-    email: Optional[str] = None
-    password: Optional[str] = None
-    phone: Optional[str] = None
-    userStatus: Optional[int] = Field(None, format="int32", description="User Status")
-
-# In-memory storage (for demo purposes)
+# In-memory storage (for demo purposes). Models are validated when they are
+# written (POST/PUT); returning a stored instance through its response_model
+# passes it through without re-validation and dumps it straight to JSON.
 pets_db: Dict[int, Pet] = {}
 orders_db: Dict[int, Order] = {}
 users_db: Dict[str, User] = {}
 inventory_db: Dict[str, int] = {"available": 5, "pending": 3, "sold": 2}
+# inventory_db is never mutated, so its JSON body is encoded once
+_INVENTORY_CACHE = orjson.dumps(inventory_db)
+
+# Secondary indexes over pets_db, kept in sync by index_pet/unindex_pet
+status_index: Dict[PetStatus, Set[int]] = defaultdict(set)
+tag_index: Dict[str, Set[int]] = defaultdict(set)
+pet_tag_names_cache: Dict[int, frozenset] = {}
+
+_next_pet_id = 1
+_next_order_id = 1
 
 # Helper functions
 def get_next_pet_id():
-    return max(pets_db.keys()) + 1 if pets_db else 1
+    global _next_pet_id
+    pet_id = _next_pet_id
+    _next_pet_id += 1
+    return pet_id
 
 def get_next_order_id():
-    return max(orders_db.keys()) + 1 if orders_db else 1
+    global _next_order_id
+    order_id = _next_order_id
+    _next_order_id += 1
+    return order_id
+
+# The Response objects below are built once and shared by every request.
+# FastAPI sets `response.background` on any returned Response whose
+# background is None, so a handler returning one of them must never declare
+# a BackgroundTasks parameter: its tasks would stick to the shared instance
+# and run again after every later request.
+@lru_cache(maxsize=None)
+def message_response(message: str) -> Response:
+    return Response(content=orjson.dumps({"message": message}), media_type="application/json")
+
+def error_response(status_code: int, detail: str) -> Response:
+    # Same body HTTPException would produce, built once instead of raised
+    return Response(content=orjson.dumps({"detail": detail}), status_code=status_code, media_type="application/json")
+
+PET_NOT_FOUND = error_response(404, "Pet not found")
+ORDER_NOT_FOUND = error_response(404, "Order not found")
+USER_NOT_FOUND = error_response(404, "User not found")
+INVALID_ID = error_response(400, "Invalid ID supplied")
+
+UPLOAD_OK = Response(
+    content=ApiResponse(code=200, type="success", message="Image uploaded successfully").model_dump_json(),
+    media_type="application/json",
+)
+
+# Serializer compiled once for the exact List[Pet] schema; it writes JSON
+# straight from the models without an intermediate dict per pet
+PET_LIST_ADAPTER = TypeAdapter(List[Pet])
+
+def pets_response(pet_ids: Set[int]) -> Response:
+    pets = [pets_db[pet_id] for pet_id in sorted(pet_ids)]
+    return Response(content=PET_LIST_ADAPTER.dump_json(pets), media_type="application/json")
+
+def index_pet(pet: Pet):
+    if pet.status:
+        status_index[pet.status].add(pet.id)
+    tag_names = frozenset(tag.name for tag in pet.tags or () if tag.name)
+    pet_tag_names_cache[pet.id] = tag_names
+    for tag_name in tag_names:
+        tag_index[tag_name].add(pet.id)
+
+def unindex_pet(pet: Pet):
+    status_index.get(pet.status, set()).discard(pet.id)
+    for tag_name in pet_tag_names_cache.pop(pet.id, frozenset()):
+        tag_index[tag_name].discard(pet.id)
 
 # Pet endpoints
 @app.post("/pet/{petId}/uploadImage", tags=["pet"], response_model=ApiResponse)
@@ -97,77 +131,71 @@ async def upload_file(
 ):
     """uploads an image"""
     if petId not in pets_db:
-        raise HTTPException(status_code=404, detail="Pet not found")
+        return PET_NOT_FOUND
     
-    return ApiResponse(code=200, type="success", message="Image uploaded successfully")
+    return UPLOAD_OK
 
-@app.post("/pet", tags=["pet"])
+@app.post("/pet", tags=["pet"], response_model=Pet)
 async def add_pet(pet: Pet):
     """Add a new pet to the store"""
-    if not pet.name or not pet.photoUrls:
-        raise HTTPException(status_code=405, detail="Invalid input")
-    
     pet_id = get_next_pet_id()
     pet.id = pet_id
     pets_db[pet_id] = pet
+    index_pet(pet)
     return pet
 
-@app.put("/pet", tags=["pet"])
+@app.put("/pet", tags=["pet"], response_model=Pet)
 async def update_pet(pet: Pet):
     """Update an existing pet"""
     if not pet.id:
-        raise HTTPException(status_code=400, detail="Invalid ID supplied")
+        return INVALID_ID
     
     if pet.id not in pets_db:
-        raise HTTPException(status_code=404, detail="Pet not found")
+        return PET_NOT_FOUND
     
+    unindex_pet(pets_db[pet.id])
     pets_db[pet.id] = pet
+    index_pet(pet)
     return pet
 
-@app.get("/pet/findByStatus", tags=["pet"], response_model=List[Pet])
+@app.get("/pet/findByStatus", tags=["pet"], responses={200: {"model": List[Pet]}})
 async def find_pets_by_status(status: List[PetStatus] = Query(..., description="Status values that need to be considered for filter")):
     """Finds Pets by status"""
-    result = []
-    for pet in pets_db.values():
-        if pet.status in status:
-            result.append(pet)
-    return result
+    ids = set().union(*(status_index.get(s, ()) for s in frozenset(status)))
+    return pets_response(ids)
 
-@app.get("/pet/findByTags", tags=["pet"], response_model=List[Pet], deprecated=True)
+@app.get("/pet/findByTags", tags=["pet"], responses={200: {"model": List[Pet]}}, deprecated=True)
 async def find_pets_by_tags(tags: List[str] = Query(..., description="Tags to filter by")):
     """Finds Pets by tags"""
-    result = []
-    for pet in pets_db.values():
-        if pet.tags:
-            pet_tag_names = [tag.name for tag in pet.tags if tag.name]
-            if any(tag in pet_tag_names for tag in tags):
-                result.append(pet)
-    return result
+    ids = set().union(*(tag_index.get(tag, ()) for tag in frozenset(tags)))
+    return pets_response(ids)
 
 @app.get("/pet/{petId}", tags=["pet"], response_model=Pet)
 async def get_pet_by_id(petId: int):
     """Find pet by ID"""
     if petId not in pets_db:
-        raise HTTPException(status_code=404, detail="Pet not found")
+        return PET_NOT_FOUND
     return pets_db[petId]
 
 @app.post("/pet/{petId}", tags=["pet"])
 async def update_pet_with_form(
     petId: int,
     name: Optional[str] = Form(None, description="Updated name of the pet"),
-    status: Optional[str] = Form(None, description="Updated status of the pet")
+    status: Optional[PetStatus] = Form(None, description="Updated status of the pet")
 ):
     """Updates a pet in the store with form data"""
     if petId not in pets_db:
         raise HTTPException(status_code=405, detail="Invalid input")
     
     pet = pets_db[petId]
+    unindex_pet(pet)
     if name:
         pet.name = name
     if status:
         pet.status = status
+    index_pet(pet)
     
-    return {"message": "Pet updated successfully"}
+    return message_response("Pet updated successfully")
 
 @app.delete("/pet/{petId}", tags=["pet"])
 async def delete_pet(
@@ -176,23 +204,20 @@ async def delete_pet(
 ):
     """Deletes a pet"""
     if petId not in pets_db:
-        raise HTTPException(status_code=404, detail="Pet not found")
+        return PET_NOT_FOUND
     
-    del pets_db[petId]
-    return {"message": "Pet deleted successfully"}
+    unindex_pet(pets_db.pop(petId))
+    return message_response("Pet deleted successfully")
 
 # Store endpoints
 @app.get("/store/inventory", tags=["store"], response_model=Dict[str, int])
 async def get_inventory():
     """Returns pet inventories by status"""
-    return inventory_db
+    return Response(content=_INVENTORY_CACHE, media_type="application/json")
 
 @app.post("/store/order", tags=["store"], response_model=Order)
 async def place_order(order: Order):
     """Place an order for a pet"""
-    if not order.petId or not order.quantity:
-        raise HTTPException(status_code=400, detail="Invalid Order")
-    
     order_id = get_next_order_id()
     order.id = order_id
     orders_db[order_id] = order
@@ -202,55 +227,53 @@ async def place_order(order: Order):
 async def get_order_by_id(orderId: int):
     """Find purchase order by ID"""
     if orderId < 1 or orderId > 10:
-        raise HTTPException(status_code=400, detail="Invalid ID supplied")
+        return INVALID_ID
     if orderId not in orders_db:
-        raise HTTPException(status_code=404, detail="Order not found")
+        return ORDER_NOT_FOUND
     return orders_db[orderId]
 
 @app.delete("/store/order/{orderId}", tags=["store"])
 async def delete_order(orderId: int):
     """Delete purchase order by ID"""
     if orderId < 1:
-        raise HTTPException(status_code=400, detail="Invalid ID supplied")
+        return INVALID_ID
     if orderId not in orders_db:
-        raise HTTPException(status_code=404, detail="Order not found")
+        return ORDER_NOT_FOUND
     
     del orders_db[orderId]
-    return {"message": "Order deleted successfully"}
+    return message_response("Order deleted successfully")
 
 # User endpoints
 @app.post("/user/createWithList", tags=["user"])
 async def create_users_with_list_input(users: List[User]):
     """Creates list of users with given input array"""
-    for user in users:
-        if user.username:
-            users_db[user.username] = user
-    return {"message": "Users created successfully"}
+    users_db.update({user.username: user for user in users if user.username})
+    return message_response("Users created successfully")
 
 @app.get("/user/{username}", tags=["user"], response_model=User)
 async def get_user_by_name(username: str):
     """Get user by user name"""
     if username not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+        return USER_NOT_FOUND
     return users_db[username]
 
 @app.put("/user/{username}", tags=["user"])
 async def update_user(username: str, user: User):
     """Updated user"""
     if username not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+        return USER_NOT_FOUND
     
     users_db[username] = user
-    return {"message": "User updated successfully"}
+    return message_response("User updated successfully")
 
 @app.delete("/user/{username}", tags=["user"])
 async def delete_user(username: str):
     """Delete user"""
     if username not in users_db:
-        raise HTTPException(status_code=404, detail="User not found")
+        return USER_NOT_FOUND
     
     del users_db[username]
-    return {"message": "User deleted successfully"}
+    return message_response("User deleted successfully")
 
 @app.get("/user/login", tags=["user"], response_model=str)
 async def login_user(
@@ -267,25 +290,33 @@ async def login_user(
 @app.get("/user/logout", tags=["user"])
 async def logout_user():
     """Logs out current logged in user session"""
-    return {"message": "User logged out successfully"}
+    return message_response("User logged out successfully")
 
 @app.post("/user/createWithArray", tags=["user"])
 async def create_users_with_array_input(users: List[User]):
     """Creates list of users with given input array"""
-    for user in users:
-        if user.username:
-            users_db[user.username] = user
-    return {"message": "Users created successfully"}
+    return await create_users_with_list_input(users)
 
 @app.post("/user", tags=["user"])
 async def create_user(user: User):
     """Create user"""
     if user.username:
         users_db[user.username] = user
-    return {"message": "User created successfully"}
+    return message_response("User created successfully")
+
+# Handlers only touch in-memory state, so they must stay `async def`: a sync
+# handler would be dispatched to the threadpool on every request.
+for route in app.routes:
+    if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.endpoint):
+        raise RuntimeError(f"Handler for {route.path} must be declared with async def")
 
 # Add some sample data for testing
 def init_sample_data():
+    # The lifespan can run more than once per process (e.g. repeated
+    # TestClient sessions), so start from empty stores and indexes
+    for store in (pets_db, orders_db, users_db, status_index, tag_index, pet_tag_names_cache):
+        store.clear()
+
     # Sample pets
     sample_pet = Pet(
         id=1,
@@ -296,6 +327,7 @@ def init_sample_data():
         tags=[Tag(id=1, name="friendly")]
     )
     pets_db[1] = sample_pet
+    index_pet(sample_pet)
     
     # Sample user
     sample_user = User(
@@ -321,8 +353,37 @@ def init_sample_data():
     )
     orders_db[1] = sample_order
 
-# Initialize sample data
-init_sample_data()
+    # Continue numbering after the hand-seeded IDs
+    global _next_pet_id, _next_order_id
+    _next_pet_id = max(pets_db) + 1
+    _next_order_id = max(orders_db) + 1
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8090)
\ No newline at end of file
+    import uvicorn
+
+    # Prefer the uvloop event loop and httptools parser from uvicorn[standard],
+    # falling back to the pure-Python implementations when they are missing.
+    try:
+        import uvloop  # noqa: F401
+        import httptools  # noqa: F401
+        loop, http = "uvloop", "httptools"
+    except ImportError:
+        loop, http = "asyncio", "h11"
+
+    # Each worker process keeps its own in-memory storage, so writes made
+    # through one worker are not visible to the others. Stay single-process
+    # unless PETSTORE_WORKERS asks for more.
+    workers = int(os.environ.get("PETSTORE_WORKERS", "1"))
+
+    uvicorn.run(
+        # Multiple workers have to import the app themselves
+        app if workers == 1 else "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        workers=workers,
+        host="0.0.0.0",
+        port=8090,
+        loop=loop,
+        http=http,
+        log_level="warning",
+        access_log=False,
+    )
@@ -0,0 +1,57 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Tuple
+from enum import Enum
+from datetime import datetime
+
+# Enums
+class PetStatus(str, Enum):
+    available = "available"
+    pending = "pending"
+    sold = "sold"
+
+class OrderStatus(str, Enum):
+    placed = "placed"
+    approved = "approved"
+    delivered = "delivered"
+
+# Models
+class Category(BaseModel):
+    id: Optional[int] = Field(None, format="int64")
+    name: Optional[str] = None
+
+class Tag(BaseModel):
+    id: Optional[int] = Field(None, format="int64")
+    name: Optional[str] = None
+
+class Pet(BaseModel):
+    id: Optional[int] = Field(None, format="int64")
+    category: Optional[Category] = None
+    name: str = Field(..., min_length=1, example="doggie")
+    # Tuples rather than lists: stored pets are replaced, not appended to,
+    # and a tuple is smaller than an over-allocated list
+    photoUrls: Tuple[str, ...] = Field(..., min_length=1, description="Pet photo URLs")
+    tags: Optional[Tuple[Tag, ...]] = None
+    status: Optional[PetStatus] = Field(None, description="pet status in the store")
+
+class ApiResponse(BaseModel):
+    code: Optional[int] = Field(None, format="int32")
+    type: Optional[str] = None
+    message: Optional[str] = None
+
+class Order(BaseModel):
+    id: Optional[int] = Field(None, format="int64")
+    petId: int = Field(..., ge=1, format="int64")
+    quantity: int = Field(..., ge=1, format="int32")
+    shipDate: Optional[datetime] = None
+    status: Optional[OrderStatus] = Field(None, description="Order Status")
+    complete: Optional[bool] = None
+
+class User(BaseModel):
+    id: Optional[int] = Field(None, format="int64")
+    username: Optional[str] = None
+    firstName: Optional[str] = None
+    lastName: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
+    phone: Optional[str] = None
+    userStatus: Optional[int] = Field(None, format="int32", description="User Status")